@@ -7,19 +7,86 @@ except ImportError:
     from ETLconfig import SQL_CONN_STRING
 
 
+STAGING_SUFFIX = "_staging"
+OLD_SUFFIX = "_old"
+CHUNK_SIZE = 10000
+
+
 def get_sql_engine():
     """Crée le moteur SQL à partir de la configuration"""
     conn_str = f"mssql+pyodbc:///?odbc_connect={SQL_CONN_STRING.replace(' ', '%20')}"
-    return sqlalchemy.create_engine(conn_str)
+    # fast_executemany : insertions en masse (bulk) côté pyodbc
+    return sqlalchemy.create_engine(conn_str, fast_executemany=True)
+
+
+def _rename_table(conn, old_name, new_name):
+    """Renomme une table selon le dialecte (SQL Server ou SQLite)"""
+    if conn.dialect.name == "mssql":
+        conn.exec_driver_sql(f"EXEC sp_rename '{old_name}', '{new_name}'")
+    else:
+        conn.exec_driver_sql(f'ALTER TABLE "{old_name}" RENAME TO "{new_name}"')
+
+
+def _drop_table(conn, table):
+    """Supprime une table si elle existe"""
+    if sqlalchemy.inspect(conn).has_table(table):
+        conn.exec_driver_sql(f'DROP TABLE "{table}"')
+
+
+def _write_staging(df, table, engine):
+    """Écrit un DataFrame dans la table de staging associée à `table`"""
+    staging = f"{table}{STAGING_SUFFIX}"
+    df.to_sql(
+        staging,
+        engine,
+        if_exists='replace',
+        index=False,
+        chunksize=CHUNK_SIZE
+    )
+    return staging
+
+
+def _publish_tables(engine, tables):
+    """
+    Publie les tables de staging dans une seule transaction courte :
+    table -> table_old, table_staging -> table, puis suppression de table_old.
+    En cas d'échec, la transaction est annulée et les tables en ligne restent intactes.
+    """
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            # pysqlite n'ouvre pas de transaction avant un DDL : on la démarre explicitement
+            conn.exec_driver_sql("BEGIN")
+
+        for table in tables:
+            old = f"{table}{OLD_SUFFIX}"
+            _drop_table(conn, old)
+            if sqlalchemy.inspect(conn).has_table(table):
+                _rename_table(conn, table, old)
+            _rename_table(conn, f"{table}{STAGING_SUFFIX}", table)
+            _drop_table(conn, old)
+
+
+def _drop_staging_tables(engine, tables):
+    """Nettoie les tables de staging après un échec de chargement"""
+    try:
+        with engine.begin() as conn:
+            for table in tables:
+                _drop_table(conn, f"{table}{STAGING_SUFFIX}")
+    except Exception as e:
+        print(f" Erreur lors du nettoyage des tables de staging : {e}")
 
 
-def load_data(df):
+def load_data(df, engine=None):
     """
     CHARGE :
     - Table de faits
     - DIM_Date
     - DIM_Employee
     - DIM_Customer
+
+    Les données sont d'abord écrites dans des tables de staging, puis
+    publiées ensemble par renommage dans une seule transaction : les
+    lecteurs ne voient jamais de table absente ou partiellement remplie.
     """
     print("\n--- 3. CHARGEMENT (LOAD VERS SQL SERVER) ---")
 
@@ -28,8 +95,11 @@ def load_data(df):
     DIM_EMPLOYEE_TABLE = "DIM_Employee"
     DIM_CUSTOMER_TABLE = "DIM_Customer"
 
+    staged_tables = []
+
     try:
-        engine = get_sql_engine()
+        if engine is None:
+            engine = get_sql_engine()
 
         print("-> Connexion SQL Server réussie")
 
@@ -41,61 +111,52 @@ def load_data(df):
         dim_customer = df.attrs.get('dim_customer')
 
         # =========================================================
-        # 2. CHARGEMENT TABLE DE FAITS
+        # 2. CHARGEMENT TABLE DE FAITS (STAGING)
         # =========================================================
         print(f"\n-> Chargement table de faits : {FACT_TABLE}")
         df_fact = df.copy()
 
-        df_fact.to_sql(
-            FACT_TABLE,
-            engine,
-            if_exists='replace',
-            index=False
-        )
+        staged_tables.append(FACT_TABLE)
+        staging = _write_staging(df_fact, FACT_TABLE, engine)
 
-        print(f"SUCCÈS : {len(df_fact)} lignes insérées dans {FACT_TABLE}")
+        print(f"SUCCÈS : {len(df_fact)} lignes insérées dans {staging}")
 
         # =========================================================
-        # 3. CHARGEMENT DIM_DATE
+        # 3. CHARGEMENT DIM_DATE (STAGING)
         # =========================================================
         if dim_date is not None:
             print(f"\n-> Chargement dimension Date : {DIM_DATE_TABLE}")
-            dim_date.to_sql(
-                DIM_DATE_TABLE,
-                engine,
-                if_exists='replace',
-                index=False
-            )
-            print(f"SUCCÈS : {len(dim_date)} lignes dans {DIM_DATE_TABLE}")
+            staged_tables.append(DIM_DATE_TABLE)
+            staging = _write_staging(dim_date, DIM_DATE_TABLE, engine)
+            print(f"SUCCÈS : {len(dim_date)} lignes dans {staging}")
 
         # =========================================================
-        # 4. CHARGEMENT DIM_EMPLOYEE
+        # 4. CHARGEMENT DIM_EMPLOYEE (STAGING)
         # =========================================================
         if dim_employee is not None:
             print(f"\n-> Chargement dimension Employee : {DIM_EMPLOYEE_TABLE}")
-            dim_employee.to_sql(
-                DIM_EMPLOYEE_TABLE,
-                engine,
-                if_exists='replace',
-                index=False
-            )
-            print(f"SUCCÈS : {len(dim_employee)} lignes dans {DIM_EMPLOYEE_TABLE}")
+            staged_tables.append(DIM_EMPLOYEE_TABLE)
+            staging = _write_staging(dim_employee, DIM_EMPLOYEE_TABLE, engine)
+            print(f"SUCCÈS : {len(dim_employee)} lignes dans {staging}")
 
         # =========================================================
-        # 5. CHARGEMENT DIM_CUSTOMER
+        # 5. CHARGEMENT DIM_CUSTOMER (STAGING)
         # =========================================================
         if dim_customer is not None:
             print(f"\n-> Chargement dimension Customer : {DIM_CUSTOMER_TABLE}")
-            dim_customer.to_sql(
-                DIM_CUSTOMER_TABLE,
-                engine,
-                if_exists='replace',
-                index=False
-            )
-            print(f"SUCCÈS : {len(dim_customer)} lignes dans {DIM_CUSTOMER_TABLE}")
+            staged_tables.append(DIM_CUSTOMER_TABLE)
+            staging = _write_staging(dim_customer, DIM_CUSTOMER_TABLE, engine)
+            print(f"SUCCÈS : {len(dim_customer)} lignes dans {staging}")
+
+        # =========================================================
+        # 6. PUBLICATION (SWAP ATOMIQUE)
+        # =========================================================
+        print(f"\n-> Publication des tables : {', '.join(staged_tables)}")
+        _publish_tables(engine, staged_tables)
+        print("SUCCÈS : tables publiées")
 
         # =========================================================
-        # 6. VÉRIFICATIONS
+        # 7. VÉRIFICATIONS
         # =========================================================
         with engine.begin() as conn:
             for table in [
@@ -118,6 +179,6 @@ def load_data(df):
 
     except Exception as e:
         print(f" Erreur lors du chargement SQL : {e}")
+        if engine is not None and staged_tables:
+            _drop_staging_tables(engine, staged_tables)
         return False
-
-